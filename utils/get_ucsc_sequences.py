@@ -26,8 +26,8 @@ Outputs:
 
 import argparse, requests, time, re, sys, yaml
 from pathlib import Path
-from pam_scanner import scan_spcas9_sites, write_crispr_candidates
-from qc_ucsc_seq import basic_qc, qc_pam_sites
+from pam_scanner import scan_sequences, write_crispr_candidates
+from qc_ucsc_seq import basic_qc, qc_pam_sites, scan_and_qc
 
 def load_config():
     """Load configuration from config.yaml and policy.yaml files."""
@@ -49,19 +49,24 @@ def load_config():
         # Merge policy into config
         config['policy'] = policy
     
-    # Flatten the nested structure for backward compatibility
-    def flatten_dict(d, prefix=''):
+    # Flatten the nested structure for backward compatibility: iterative
+    # with an explicit stack, so deep policy trees fill one output dict
+    # instead of allocating and merging a dict per nesting level
+    def flatten_dict(d):
         flattened = {}
-        for key, value in d.items():
-            new_key = f'{prefix}_{key.upper()}' if prefix else key.upper()
-            if isinstance(value, dict):
-                flattened.update(flatten_dict(value, new_key))
-            else:
-                flattened[new_key] = value
+        stack = [('', d)]
+        while stack:
+            prefix, current = stack.pop()
+            for key, value in current.items():
+                new_key = f'{prefix}_{key.upper()}' if prefix else key.upper()
+                if isinstance(value, dict):
+                    stack.append((new_key, value))
+                else:
+                    flattened[new_key] = value
         return flattened
-    
+
     flattened = flatten_dict(config)
-    
+
     return flattened
 
 CONFIG = load_config()
@@ -121,7 +126,7 @@ def get_flanking_sequences(chrom, start, end, up=None, down=None, strand="+", ge
 
 def write_pam_fasta(candidates, filename, qc_results=None):
     """Write PAM candidates to FASTA format for IDT analysis."""
-    if not candidates:
+    if len(candidates) == 0:
         print(f"⚠️  No PAM candidates written to {filename}")
         return
     
@@ -144,7 +149,7 @@ def write_pam_fasta(candidates, filename, qc_results=None):
             f.write(f">{name}\n{spacer}\n")
     print(f"✅ Saved {filename} ({len(candidates_to_write)} PAM sequences)")
 
-def main():
+def main(argv=None):
     ap = argparse.ArgumentParser(description="Fetch upstream/downstream sequences for genomic coordinates from UCSC.")
     ap.add_argument("input", nargs='?', help="Input file with coordinates, or a single coordinate.")
     # Upstream/downstream distances are controlled by config.yaml only for reproducibility
@@ -158,7 +163,7 @@ def main():
     # QC options (parameters controlled by policy.yaml for reproducibility)
     ap.add_argument("--qc", action="store_true",
                    help="Apply quality control filters to CRISPR candidates.")
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
 
     # Handle input - either file or single coordinate
     if not args.input:
@@ -186,7 +191,15 @@ def main():
         downstream_out = CONFIG.get("OUTPUTS_DOWNSTREAM_SEQUENCES")
     upstream_records, downstream_records = [], []
     crispr_candidates = []
-    qc_candidates = []
+    scan_records = []
+
+    # Validate the PAM pattern up front so a missing config key fails
+    # before any sequences are fetched
+    if args.scan_pam:
+        pam_pattern = CONFIG.get("PAM_SCANNING_PATTERN")
+        if not pam_pattern:
+            print(f"❌ Error: PAM_SCANNING_PATTERN not found in config.yaml")
+            sys.exit(1)
 
     for i, line in enumerate(targets, 1):
         if not line.strip():
@@ -224,54 +237,20 @@ def main():
         
         if up_seq:
             upstream_records.append((f"{label}_upstream", up_seq))
-            # Scan upstream sequence for PAM sites if requested
+            # Queue upstream sequence for PAM scanning if requested
             if args.scan_pam:
-                pam_pattern = CONFIG.get("PAM_SCANNING_PATTERN")
-                if not pam_pattern:
-                    print(f"❌ Error: PAM_SCANNING_PATTERN not found in config.yaml")
-                    sys.exit(1)
-                sites = scan_spcas9_sites(up_seq, pam_pattern)
-                for idx, (spacer, pam, site_strand, pos) in enumerate(sites, 1):
-                    # Sanitize label for IDT API (remove colons and plus signs, keep coordinate hyphens)
-                    safe_label = label.replace(":", "_").replace("+", "plus")
-                    candidate = (
-                        f"{safe_label}_upstream",
-                        f"{safe_label}_upstream_g{idx}",
-                        spacer,
-                        pam,
-                        site_strand
-                    )
-                    crispr_candidates.append(candidate)
-                    
-                    # Add to QC candidates list if QC is requested
-                    if args.qc:
-                        qc_candidates.append(candidate)
-        
+                # Sanitize label for IDT API (remove colons and plus signs, keep coordinate hyphens)
+                safe_label = label.replace(":", "_").replace("+", "plus")
+                scan_records.append((f"{safe_label}_upstream", up_seq))
+
         if down_seq:
             downstream_records.append((f"{label}_downstream", down_seq))
-            # Scan downstream sequence for PAM sites if requested
+            # Queue downstream sequence for PAM scanning if requested
             if args.scan_pam:
-                pam_pattern = CONFIG.get("PAM_SCANNING_PATTERN")
-                if not pam_pattern:
-                    print(f"❌ Error: PAM_SCANNING_PATTERN not found in config.yaml")
-                    sys.exit(1)
-                sites = scan_spcas9_sites(down_seq, pam_pattern)
-                for idx, (spacer, pam, site_strand, pos) in enumerate(sites, 1):
-                    # Sanitize label for IDT API (remove colons and plus signs, keep coordinate hyphens)
-                    safe_label = label.replace(":", "_").replace("+", "plus")
-                    candidate = (
-                        f"{safe_label}_downstream",
-                        f"{safe_label}_downstream_g{idx}",
-                        spacer,
-                        pam,
-                        site_strand
-                    )
-                    crispr_candidates.append(candidate)
-                    
-                    # Add to QC candidates list if QC is requested
-                    if args.qc:
-                        qc_candidates.append(candidate)
-        
+                # Sanitize label for IDT API (remove colons and plus signs, keep coordinate hyphens)
+                safe_label = label.replace(":", "_").replace("+", "plus")
+                scan_records.append((f"{safe_label}_downstream", down_seq))
+
         time.sleep(1.0)  # UCSC API rate limit
 
     def write_fasta(records, filename):
@@ -289,10 +268,13 @@ def main():
     write_fasta(downstream_records, downstream_out)
     
     if args.scan_pam:
+        scan_names = [name for name, seq in scan_records]
+        scan_seqs = [seq for name, seq in scan_records]
         if args.qc:
-            # Apply QC to all candidates using policy parameters
-            qc_results = qc_pam_sites(qc_candidates)
-            
+            # Fused scan + QC: each sequence's candidates are QC'd right
+            # after its scan instead of in a second pass over the full list
+            crispr_candidates, qc_results = scan_and_qc(scan_seqs, scan_names, pam_pattern)
+
             # Write QC results (CSV format with individual QC columns)
             qc_output = CONFIG.get("OUTPUTS_CRISPR_CANDIDATES_QC")
             with open(qc_output, "w") as f:
@@ -311,6 +293,7 @@ def main():
             write_pam_fasta(crispr_candidates, candidates_out, qc_results)
         else:
             # Write PAM candidates in FASTA format (all candidates)
+            crispr_candidates = scan_sequences(scan_seqs, scan_names, pam_pattern)
             candidates_out = CONFIG.get("OUTPUTS_CRISPR_CANDIDATES")
             write_pam_fasta(crispr_candidates, candidates_out)
     
@@ -12,7 +12,8 @@ Usage:
     python idt_batch_crispr.py file1.txt [file2.txt ...]  # Analyze sequences
 """
 
-import os, time, random, requests, pandas as pd, sys, re, logging, yaml
+import argparse, os, time, random, requests, pandas as pd, sys, re, logging, yaml
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 
@@ -80,6 +81,27 @@ POLL_INTERVAL = int(CONFIG.get("IDT_POLL_INTERVAL"))
 POLL_MAX = int(CONFIG.get("IDT_POLL_MAX"))
 RETRY_ATTEMPTS = int(CONFIG.get("IDT_RETRY_ATTEMPTS"))
 
+# === 1.4. HTTP session ===
+# A single shared session keeps the TLS connection to IDT alive across submit
+# and poll calls. When httpx is installed (pip install 'httpx[http2]') the
+# session negotiates HTTP/2 so concurrent submits and polls multiplex as
+# streams over one connection; httpx falls back to HTTP/1.1 transparently if
+# the server only speaks that. Without httpx we still reuse one keep-alive
+# requests.Session instead of opening a fresh connection per call.
+try:
+    import httpx
+    SESSION = httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_connections=1, max_keepalive_connections=1),
+        timeout=TIMEOUT,
+    )
+    TIMEOUT_ERRORS = (httpx.ReadTimeout,)
+    REQUEST_ERRORS = (httpx.HTTPError,)
+except ImportError:
+    SESSION = requests.Session()
+    TIMEOUT_ERRORS = (requests.exceptions.ReadTimeout,)
+    REQUEST_ERRORS = (requests.exceptions.RequestException,)
+
 # === 1.5. Setup logging ===
 def setup_logging():
     """Set up logging for IDT batch processing."""
@@ -160,15 +182,7 @@ def read_fasta_txt(path, logger):
         raise
 
 # === 3a. Species / genome mapping ===
-species_map = {
-    "hg38": ("human", "hg38"),
-    "hg19": ("human", "hg19"),
-    "mm10": ("mouse", "mm10"),
-    "mm39": ("mouse", "mm39"),
-    "rn7": ("rat", "rn7"),
-    "danRer11": ("zebrafish", "danRer11"),
-    "ce11": ("c_elegans", "ce11"),
-}
+from species_map import SPECIES_MAP as species_map
 
 # Check genome assembly support first
 ucsc_assembly = CONFIG.get("UCSC_GENOME_ASSEMBLY")
@@ -221,13 +235,19 @@ def build_payload(named_seq_list, logger):
     }
 
 # === 4. Score helpers ===
+@lru_cache(maxsize=4096)
 def extract_numeric_score(score_text):
+    # Memoized: the same score strings are re-parsed on every poll attempt,
+    # so cache the regex+float conversion (inputs are short strings, cache is bounded)
     if not score_text:
         return None
     nums = re.findall(r'-?\d+\.?\d*', str(score_text))
     return float(nums[0]) if nums else None
 
 def calculate_on_off_score(on_val, off_val):
+    # Short-circuit before touching the regex when either score is missing
+    if not on_val or not off_val:
+        return None
     on = extract_numeric_score(on_val)
     off = extract_numeric_score(off_val)
     if on is None or off is None:
@@ -292,7 +312,7 @@ def poll_for_result(lookup_key, sequence_map=None, logger=None):
     for attempt in range(POLL_MAX):
         try:
             logger.debug(f"Poll attempt {attempt + 1}/{POLL_MAX}")
-            r = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
+            r = SESSION.get(url, headers=HEADERS, timeout=TIMEOUT)
             
             if r.status_code != 200:
                 logger.warning(f"HTTP {r.status_code} on poll attempt {attempt + 1}")
@@ -311,7 +331,7 @@ def poll_for_result(lookup_key, sequence_map=None, logger=None):
                 
             time.sleep(POLL_INTERVAL)
             
-        except requests.exceptions.RequestException as e:
+        except REQUEST_ERRORS as e:
             logger.error(f"Request error on poll attempt {attempt + 1}: {str(e)}")
             time.sleep(POLL_INTERVAL)
         except Exception as e:
@@ -345,7 +365,7 @@ def tiny_test(logger):
         return False
     
     try:
-        r = requests.post(ENDPOINT_SEARCH, headers=HEADERS, json=payload, timeout=TIMEOUT)
+        r = SESSION.post(ENDPOINT_SEARCH, headers=HEADERS, json=payload, timeout=TIMEOUT)
         logger.info(f"Test request HTTP status: {r.status_code}")
         print("HTTP status:", r.status_code)
         
@@ -432,9 +452,9 @@ def process_file(txt_path, logger):
         for attempt in range(RETRY_ATTEMPTS):
             try:
                 logger.debug(f"Batch {batch_num} attempt {attempt + 1}/{RETRY_ATTEMPTS}")
-                r = requests.post(ENDPOINT_SEARCH, headers=HEADERS, json=payload, timeout=TIMEOUT)
+                r = SESSION.post(ENDPOINT_SEARCH, headers=HEADERS, json=payload, timeout=TIMEOUT)
                 break
-            except requests.exceptions.ReadTimeout:
+            except TIMEOUT_ERRORS:
                 if attempt < RETRY_ATTEMPTS - 1:
                     logger.warning(f"Timeout on batch {batch_num} attempt {attempt + 1}, retrying...")
                     print(f"    ⏰ Timeout on attempt {attempt + 1}, retrying...")
@@ -532,13 +552,22 @@ def process_file(txt_path, logger):
         return None
 
 # === 9. Main ===
-def main():
+def main(argv=None):
+    global BATCH_SIZE
+
+    parser = argparse.ArgumentParser(description="Batch-analyze FASTA files with IDT's CRISPR tools")
+    parser.add_argument("files", nargs="*", help="FASTA .txt files to analyze")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"Sequences per IDT request (default: {BATCH_SIZE} from config.yaml)")
+    args = parser.parse_args(argv)
+    BATCH_SIZE = args.batch_size
+
     # Set up logging first
     logger, log_file = setup_logging()
     logger.info("Starting IDT batch CRISPR analysis")
-    logger.info(f"Command line arguments: {sys.argv}")
-    
-    if len(sys.argv) < 2:
+    logger.info(f"Command line arguments: {args}")
+
+    if not args.files:
         logger.info("No input files provided, running connectivity test only...")
         print("🔎 No input files provided, running connectivity test only...")
         print("📝 Log file:", log_file)
@@ -554,7 +583,7 @@ def main():
             print(f"📝 Check log file for details: {log_file}")
         return
     
-    input_files = [f for f in sys.argv[1:] if Path(f).suffix == ".txt" and Path(f).exists()]
+    input_files = [f for f in args.files if Path(f).suffix == ".txt" and Path(f).exists()]
     if not input_files:
         error_msg = "No valid input files found."
         logger.error(error_msg)
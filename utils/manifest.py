@@ -8,19 +8,34 @@ configuration hashes, and summary statistics.
 """
 
 import json
+import sys
 import yaml
 import hashlib
 import datetime
 import platform
 import getpass
 import socket
+from functools import partial
 from pathlib import Path
 
+# Prefer the libyaml C loader (several times faster); fall back to the
+# pure-Python loader when PyYAML was built without libyaml
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 
 def file_hash(path):
     """Generate MD5 hash of a file (first 7 characters for brevity)."""
     with open(path, "rb") as f:
-        return hashlib.md5(f.read()).hexdigest()[:7]
+        if sys.version_info >= (3, 11):
+            # Streams the file through the digest in C without slurping it
+            return hashlib.file_digest(f, "md5").hexdigest()[:7]
+        digest = hashlib.md5()
+        for chunk in iter(partial(f.read, 1 << 18), b""):
+            digest.update(chunk)
+        return digest.hexdigest()[:7]
 
 
 def write_manifest(config_path="../config.yaml", policy_path="../policy.yaml", summary_stats=None, output="manifest.json"):
@@ -38,13 +53,13 @@ def write_manifest(config_path="../config.yaml", policy_path="../policy.yaml", s
     config_file = Path(config_path)
     policy_file = Path(policy_path)
     
-    with open(config_file) as f: 
-        cfg = yaml.safe_load(f)
-    with open(policy_file) as f: 
-        policy = yaml.safe_load(f)
+    with open(config_file) as f:
+        cfg = yaml.load(f, Loader=_YamlLoader)
+    with open(policy_file) as f:
+        policy = yaml.load(f, Loader=_YamlLoader)
 
     manifest = {
-        "run_id": datetime.datetime.now(datetime.timezone.utc).isoformat().replace('+00:00', 'Z'),
+        "run_id": datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
         "guideforge_version": "1.1.0",
         "backend": "IDT",
         "genome_assembly": cfg.get("ucsc", {}).get("genome_assembly"),
@@ -16,101 +16,253 @@ Usage:
     sites = scan_spcas9_sites("ATCGATCGATCGATCGATCGNGG")
 """
 
-import re
+import itertools
+from functools import lru_cache
 from pathlib import Path
 
+import numpy as np
+
+# Nucleotide ambiguity codes (IUPAC) used in PAM patterns
+AMBIGUITY_CODES = {
+    'N': 'ACGT',     # Any nucleotide
+    'R': 'AG',       # Purine (A or G)
+    'Y': 'CT',       # Pyrimidine (C or T)
+    'S': 'GC',       # Strong (G or C)
+    'W': 'AT',       # Weak (A or T)
+    'K': 'GT',       # Keto (G or T)
+    'M': 'AC',       # Amino (A or C)
+    'B': 'CGT',      # Not A
+    'D': 'AGT',      # Not C
+    'H': 'ACT',      # Not G
+    'V': 'ACG',      # Not T
+}
+
+# Byte-level lookup table mapping A/C/G/T to 0..3 and everything else
+# (N, lowercase, gaps) to 4 so invalid bases are cheap to detect in bulk
+_BASE_CODE = {'A': 0, 'C': 1, 'G': 2, 'T': 3}
+_ENCODE_LUT = np.full(256, 4, dtype=np.uint8)
+for _base, _code in _BASE_CODE.items():
+    _ENCODE_LUT[ord(_base)] = _code
+
+
+def _encode(seq):
+    """Encode a DNA string into a uint8 array (A/C/G/T -> 0..3, other -> 4)."""
+    return _ENCODE_LUT[np.frombuffer(seq.encode("ascii"), dtype=np.uint8)]
+
+
+# Complement translation table, built once at import; bytes.translate skips
+# the Unicode codepoint machinery str.translate pays for
+_RC_TBL = bytes.maketrans(b"ACGTNacgtn", b"TGCANtgcan")
+
 
 def reverse_complement(seq):
     """Generate reverse complement of DNA sequence.
-    
+
     Args:
         seq (str): DNA sequence
-        
+
     Returns:
         str: Reverse complement sequence
     """
-    tbl = str.maketrans("ACGTNacgtn", "TGCANtgcan")
-    return seq.translate(tbl)[::-1]
+    return seq.encode("ascii").translate(_RC_TBL)[::-1].decode("ascii")
+
+
+@lru_cache(maxsize=32)
+def _pam_acceptance(pam_pattern):
+    """Build (and cache) the acceptance table for a PAM pattern.
+
+    Expands nucleotide ambiguity codes into two acceptance sets indexed by
+    the base-4 encoding of a PAM candidate: one for '+' strand PAMs and one
+    accepting the reverse complement of a PAM as it appears on the forward
+    sequence (e.g. "CCN" for "NGG"), so both strands can be tested in a
+    single forward pass. For PAMs up to 3nt the 4**k possible encodings fit
+    in 64 bits, so the sets are packed into uint64 bitmasks; longer PAMs
+    (Cas12a etc.) use boolean tables.
+
+    Args:
+        pam_pattern (str): PAM pattern (e.g., "NGG", "RGG", "VGG")
+
+    Returns:
+        tuple: (forward acceptance set, reverse-complement acceptance set),
+        each either an int bitmask or a boolean numpy table
+    """
+    size = 4 ** len(pam_pattern)
+    allowed = []
+    for char in pam_pattern:
+        bases = AMBIGUITY_CODES.get(char, char)
+        # Bases outside ACGT can never match a valid sequence position
+        allowed.append([_BASE_CODE[b] for b in bases if b in _BASE_CODE])
+
+    accepted = []
+    for combo in itertools.product(*allowed):
+        idx = 0
+        for code in combo:
+            idx = idx * 4 + code
+        # Reverse complement: complement each base (3 - code), reversed order
+        rc_idx = 0
+        for code in reversed(combo):
+            rc_idx = rc_idx * 4 + (3 - code)
+        accepted.append((idx, rc_idx))
+
+    if size <= 64:
+        mask = 0
+        rc_mask = 0
+        for idx, rc_idx in accepted:
+            mask |= 1 << idx
+            rc_mask |= 1 << rc_idx
+        return mask, rc_mask
+
+    table = np.zeros(size, dtype=bool)
+    rc_table = np.zeros(size, dtype=bool)
+    for idx, rc_idx in accepted:
+        table[idx] = True
+        rc_table[rc_idx] = True
+    return table, rc_table
+
+
+def _scan_sites(enc, tables, pam_len):
+    """Return spacer start positions for both strands in one forward pass.
+
+    A '+' hit at position i is a valid 20nt spacer at enc[i:i+20] followed
+    by an accepted PAM. A '-' hit at window start p is an accepted
+    reverse-complement PAM at enc[p:p+pam_len] followed by a valid 20nt
+    spacer, i.e. the same site the old reverse-complement re-scan found,
+    without materializing the reverse-complement sequence.
+
+    Args:
+        enc (numpy.ndarray): Encoded sequence (uint8 codes from _encode)
+        tables (tuple): (forward, reverse-complement) tables from _pam_acceptance
+        pam_len (int): Length of the PAM pattern
+
+    Returns:
+        tuple: (plus-strand positions, minus-strand window start positions)
+    """
+    n = enc.shape[0]
+    limit = n - 20 - pam_len + 1
+    if limit <= 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    # Spacer windows must be all A/C/G/T: prefix-sum the invalid-base mask
+    # so each 20nt window check is O(1)
+    bad = enc >= 4
+    bad_cumsum = np.concatenate(([0], np.cumsum(bad)))
+    spacer_ok = (bad_cumsum[20:] - bad_cumsum[:-20]) == 0
+
+    # Base-4 encode every PAM-length window and look it up in both tables
+    table, rc_table = tables
+    m = n - pam_len + 1
+    pam_idx = np.zeros(m, dtype=np.int64)
+    pam_bad = np.zeros(m, dtype=bool)
+    for t in range(pam_len):
+        col = enc[t:t + m]
+        pam_bad |= col >= 4
+        pam_idx = pam_idx * 4 + col
+    valid = ~pam_bad
+    idx_valid = pam_idx[valid]
+    fwd_hit = np.zeros(m, dtype=bool)
+    rc_hit = np.zeros(m, dtype=bool)
+    if isinstance(table, int):
+        # Bitmask lookup: branchless shift-and-test against the packed set
+        shifts = idx_valid.astype(np.uint64)
+        one = np.uint64(1)
+        fwd_hit[valid] = ((np.uint64(table) >> shifts) & one) != 0
+        rc_hit[valid] = ((np.uint64(rc_table) >> shifts) & one) != 0
+    else:
+        fwd_hit[valid] = table[idx_valid]
+        rc_hit[valid] = rc_table[idx_valid]
+
+    plus = np.nonzero(spacer_ok[:limit] & fwd_hit[20:20 + limit])[0]
+    minus = np.nonzero(rc_hit[:limit] & spacer_ok[pam_len:pam_len + limit])[0]
+    return plus, minus
 
 
 def scan_spcas9_sites(seq, pam_pattern):
     """Scan sequence for PAM sites with configurable PAM pattern.
-    
+
+    The sequence is encoded once into a compact uint8 array and both
+    strands are scanned in a single forward pass: '-' strand sites are
+    detected as reverse-complement PAMs on the forward sequence, so no
+    reverse-complement copy of the input is ever built.
+
     Args:
         seq (str): DNA sequence to scan
         pam_pattern (str): PAM pattern (e.g., "NGG", "RGG", "VGG")
-        
+
     Returns:
         list: List of tuples (spacer, pam, strand, position)
     """
-    # Define nucleotide ambiguity codes
-    ambiguity_codes = {
-        'N': '[ACGT]',      # Any nucleotide
-        'R': '[AG]',        # Purine (A or G)
-        'Y': '[CT]',        # Pyrimidine (C or T)
-        'S': '[GC]',        # Strong (G or C)
-        'W': '[AT]',        # Weak (A or T)
-        'K': '[GT]',        # Keto (G or T)
-        'M': '[AC]',        # Amino (A or C)
-        'B': '[CGT]',       # Not A
-        'D': '[AGT]',       # Not C
-        'H': '[ACT]',       # Not G
-        'V': '[ACG]',       # Not T
-    }
-    
-    # Convert PAM pattern to regex
-    pam_regex = ""
-    for char in pam_pattern:
-        if char in ambiguity_codes:
-            pam_regex += ambiguity_codes[char]
-        else:
-            pam_regex += char
-    
+    pam_len = len(pam_pattern)
+    tables = _pam_acceptance(pam_pattern)
+    plus, minus = _scan_sites(_encode(seq), tables, pam_len)
     sites = []
-    
+
     # + strand: 20nt spacer followed by PAM
-    for m in re.finditer(f'(?=([ACGT]{{20}})({pam_regex}))', seq):
-        spacer, pam = m.group(1), m.group(2)
-        sites.append((spacer, pam, '+', m.start()))
-    
-    # - strand: scan reverse complement, then report spacer in genomic (+) orientation
-    rc_seq = reverse_complement(seq)
-    seq_len = len(seq)
-    for m in re.finditer(f'(?=([ACGT]{{20}})({pam_regex}))', rc_seq):
-        spacer_rc, pam_rc = m.group(1), m.group(2)
-        spacer = reverse_complement(spacer_rc)  # report 5'->3' on genomic +
-        pam = reverse_complement(pam_rc)
-        # Convert position back to genomic coordinates
-        pos = seq_len - (m.start() + 20 + len(pam_pattern))
+    for i in plus:
+        i = int(i)
+        sites.append((seq[i:i + 20], seq[i + 20:i + 20 + pam_len], '+', i))
+
+    # - strand: the window is PAM (reverse-complement orientation) followed
+    # by the spacer; reported in descending position order, matching the
+    # ordering the old reverse-complement re-scan produced
+    for pos in minus[::-1]:
+        pos = int(pos)
+        spacer = seq[pos + pam_len:pos + pam_len + 20]
+        pam = seq[pos:pos + pam_len]
         sites.append((spacer, pam, '-', pos))
-    
+
     return sites
 
 
+def _candidate_dtype(parent_width, name_width, pam_width):
+    """Candidate record layout: fixed-width fields in one contiguous block
+    instead of ~100 bytes of PyObject headers per 5-tuple.
+
+    The name and PAM fields are sized per scan from the actual input; a
+    fixed width would silently truncate long FASTA headers (two headers
+    sharing a truncated prefix would even collide into identical records)
+    or the site of a long PAM pattern.
+    """
+    return np.dtype([
+        ('parent', f'U{parent_width}'),
+        ('name', f'U{name_width}'),
+        ('spacer', 'U32'),
+        ('pam', f'U{pam_width}'),
+        ('strand', 'U1'),
+    ])
+
+
 def scan_sequences(sequences, names, pam_pattern):
     """Scan multiple sequences for PAM sites.
-    
+
     Args:
         sequences (list): List of DNA sequences
         names (list): List of sequence names
         pam_pattern (str): PAM pattern (e.g., "NGG", "RGG", "VGG")
-        
+
     Returns:
-        list: List of tuples (parent, name, spacer, pam, strand)
+        numpy.ndarray: Structured array with fields
+        (parent, name, spacer, pam, strand), one record per candidate;
+        records unpack like the 5-tuples they replace
     """
-    candidates = []
-    
-    for seq, name in zip(sequences, names):
-        sites = scan_spcas9_sites(seq, pam_pattern)
+    per_seq = [scan_spcas9_sites(seq, pam_pattern) for seq in sequences]
+
+    # Field widths come from this input: the longest parent name, room
+    # for the _g<idx> suffix of the largest per-sequence site count, and
+    # the PAM pattern length (the scanner accepts arbitrary-length PAMs)
+    parent_width = max((len(name) for name in names), default=1) or 1
+    max_idx = max((len(sites) for sites in per_seq), default=1) or 1
+    name_width = parent_width + 2 + len(str(max_idx))
+    candidates = np.empty(sum(len(sites) for sites in per_seq),
+                          dtype=_candidate_dtype(parent_width, name_width,
+                                                 len(pam_pattern) or 1))
+
+    row = 0
+    for sites, name in zip(per_seq, names):
         for idx, (spacer, pam, strand, pos) in enumerate(sites, 1):
-            candidates.append((
-                name,
-                f"{name}_g{idx}",
-                spacer,
-                pam,
-                strand
-            ))
-    
+            candidates[row] = (name, f"{name}_g{idx}", spacer, pam, strand)
+            row += 1
+
     return candidates
 
 
@@ -121,15 +273,17 @@ def write_crispr_candidates(candidates, filename):
         candidates (list): List of candidate tuples
         filename (str): Output filename
     """
-    if not candidates:
+    if len(candidates) == 0:
         print(f"⚠️  No CRISPR candidates found")
         return
     
-    with open(filename, "w") as f:
+    # Batch the rows through one buffered writelines call instead of a
+    # Python-level write per candidate
+    with open(filename, "w", buffering=1 << 20) as f:
         f.write("parent,name,spacer,pam,strand\n")
-        for parent, name, spacer, pam, strand in candidates:
-            f.write(f"{parent},{name},{spacer},{pam},{strand}\n")
-    
+        f.writelines(f"{parent},{name},{spacer},{pam},{strand}\n"
+                     for parent, name, spacer, pam, strand in candidates)
+
     print(f"✅ Saved {filename} ({len(candidates)} candidates)")
 
 
@@ -145,24 +299,25 @@ def main():
                        help="PAM pattern (required). Supports ambiguity codes: N=any, R=AG, Y=CT, S=GC, W=AT, K=GT, M=AC, B=CGT, D=AGT, H=ACT, V=ACG")
     args = parser.parse_args()
     
-    # Read FASTA file
+    # Read FASTA file: binary reads into a growing bytearray, with decode
+    # and uppercase applied once per record instead of once per line
     sequences, names = [], []
-    with open(args.input) as f:
-        current_name, current_seq = None, []
+    with open(args.input, "rb", buffering=1 << 20) as f:
+        current_name, buf = None, bytearray()
         for line in f:
             line = line.strip()
             if not line:
                 continue
-            if line.startswith(">"):
+            if line[:1] == b">":
                 if current_name:
-                    sequences.append("".join(current_seq).upper())
+                    sequences.append(buf.decode("ascii").upper())
                     names.append(current_name)
-                current_name = line[1:].strip()
-                current_seq = []
+                current_name = line[1:].strip().decode("ascii")
+                buf = bytearray()
             else:
-                current_seq.append(line)
+                buf += line
         if current_name:
-            sequences.append("".join(current_seq).upper())
+            sequences.append(buf.decode("ascii").upper())
             names.append(current_name)
     
     # Scan for PAM sites
@@ -19,53 +19,237 @@ Examples:
 """
 
 import argparse
+import contextlib
+import importlib
+import io
+import os
+import pickle
+import re
 import subprocess
 import sys
+import threading
 import time
 import logging
 import yaml
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Optional
 from datetime import datetime
 
+# Prefer the libyaml C loader (several times faster); fall back to the
+# pure-Python loader when PyYAML was built without libyaml
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# Flattened-config disk cache, keyed on the mtimes of both YAML files so
+# edits invalidate it automatically
+_CONFIG_CACHE = Path.home() / ".cache" / "guideforge" / "run_config.pkl"
+
+
+def _yaml_mtimes(*paths):
+    """Snapshot (path, mtime_ns or None) pairs for the config cache key."""
+    return tuple((str(p), p.stat().st_mtime_ns if p.exists() else None)
+                 for p in paths)
+
+
 def load_config():
     """Load configuration from config.yaml and policy.yaml files."""
     config_file = Path(__file__).parent.parent / "config.yaml"
     if not config_file.exists():
         return {}
-    
+
+    # Fast path: reuse the flattened dict cached on disk when neither YAML
+    # file has changed since it was written
+    try:
+        with open(_CONFIG_CACHE, "rb") as f:
+            key, flattened = pickle.load(f)
+        if key == _yaml_mtimes(*(Path(p) for p, _ in key)):
+            return flattened
+    except (OSError, EOFError, ValueError, pickle.PickleError):
+        pass
+
     with open(config_file, 'r') as f:
-        config = yaml.safe_load(f)
-    
+        config = yaml.load(f, Loader=_YamlLoader)
+
     # Load policy file if specified
     policy_file = config.get('policy_file', './policy.yaml')
     policy_path = Path(__file__).parent.parent / policy_file
-    
+
     if policy_path.exists():
         with open(policy_path, 'r') as f:
-            policy = yaml.safe_load(f)
-        
+            policy = yaml.load(f, Loader=_YamlLoader)
+
         # Merge policy into config
         config['policy'] = policy
-    
-    # Flatten the nested structure for backward compatibility
-    def flatten_dict(d, prefix=''):
+
+    # Flatten the nested structure for backward compatibility: iterative
+    # with an explicit stack, so deep policy trees fill one output dict
+    # instead of allocating and merging a dict per nesting level
+    def flatten_dict(d):
         flattened = {}
-        for key, value in d.items():
-            new_key = f'{prefix}_{key.upper()}' if prefix else key.upper()
-            if isinstance(value, dict):
-                flattened.update(flatten_dict(value, new_key))
-            else:
-                flattened[new_key] = value
+        stack = [('', d)]
+        while stack:
+            prefix, current = stack.pop()
+            for key, value in current.items():
+                new_key = key.upper() if not prefix else prefix + '_' + key.upper()
+                if isinstance(value, dict):
+                    stack.append((new_key, value))
+                else:
+                    flattened[new_key] = value
         return flattened
-    
-    return flatten_dict(config)
+
+    flattened = flatten_dict(config)
+
+    # Cache write is best-effort: a read-only home dir just skips caching
+    try:
+        _CONFIG_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        with open(_CONFIG_CACHE, "wb") as f:
+            pickle.dump((_yaml_mtimes(config_file, policy_path), flattened), f)
+    except OSError:
+        pass
+
+    return flattened
 
 CONFIG = load_config()
 
-def setup_logging(log_file=None):
+# Required key sets, defined once at module scope so validation is a set
+# difference and other entry points can reuse them
+REQUIRED_CONFIG_KEYS = frozenset({
+    'UCSC_UPSTREAM_DISTANCE', 'UCSC_DOWNSTREAM_DISTANCE', 'UCSC_GENOME_ASSEMBLY'})
+REQUIRED_OUTPUT_KEYS = frozenset({
+    'OUTPUTS_UPSTREAM_SEQUENCES', 'OUTPUTS_DOWNSTREAM_SEQUENCES',
+    'OUTPUTS_CRISPR_CANDIDATES', 'OUTPUTS_CRISPR_CANDIDATES_QC', 'OUTPUTS_TOP_GUIDES'})
+REQUIRED_QC_KEYS = frozenset({
+    'POLICY_QUALITY_CONTROL_GC_MIN', 'POLICY_QUALITY_CONTROL_GC_MAX',
+    'POLICY_QUALITY_CONTROL_MAX_POLY_T', 'POLICY_QUALITY_CONTROL_MAX_HOMOPOLYMER',
+    'POLICY_QUALITY_CONTROL_RESTRICTION_SITES'})
+REQUIRED_GUIDE_KEYS = frozenset({
+    'POLICY_GUIDE_SELECTION_MIN_ON_TARGET_SCORE', 'POLICY_GUIDE_SELECTION_MIN_OFF_TARGET_SCORE',
+    'POLICY_GUIDE_SELECTION_NUM_GUIDES_PER_GENE', 'POLICY_GUIDE_SELECTION_ACCEPTED_PAMS'})
+
+# FASTA header matcher, compiled once at module scope; (?m)^> anchors to
+# line starts so the first record needs no special case
+_FASTA_HDR = re.compile(rb'(?m)^>')
+
+
+def count_fasta_records(path):
+    """Count FASTA records with one bulk byte scan instead of per-line iteration."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return len(_FASTA_HDR.findall(data))
+
+
+def count_csv_rows(path):
+    """Count CSV data rows (excluding the header) with one bulk newline count."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return data.count(b"\n") - 1
+
+
+def _qc_counts(path):
+    """Count (passed, failed) QC rows in one file; top-level so pool workers can pickle it."""
+    import pandas as pd
+    df = pd.read_csv(path, usecols=['qc_status'],
+                     dtype={'qc_status': 'category'}, engine='c')
+    passed = int(df['qc_status'].str.startswith('Pass', na=False).sum())
+    return passed, len(df) - passed
+
+
+def count_lines(path):
+    """Count lines with one bulk newline count (handles a missing final newline)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return data.count(b"\n") + (0 if data.endswith(b"\n") or not data else 1)
+
+
+def cwd_file_names():
+    """Snapshot regular-file names in the cwd: one readdir instead of a stat per probe."""
+    return {entry.name for entry in os.scandir('.') if entry.is_file()}
+
+
+def in_cwd_snapshot(path, cwd_files):
+    """Existence test against a scandir snapshot; non-cwd paths fall back to stat."""
+    path = Path(path)
+    if str(path.parent) != '.':
+        return path.exists()
+    return path.name in cwd_files
+
+
+@dataclass
+class RunStats:
+    """Output counts gathered in one pass after the pipeline stages finish.
+
+    The summary printer and the manifest both read from this object, so
+    each output file is stat'ed and counted exactly once per run.
+    """
+    targets: int = 0
+    pam: int = 0
+    pam_exists: bool = False
+    qc_pass: int = 0
+    qc_fail: int = 0
+    qc_exists: bool = False
+    idt: dict = field(default_factory=dict)  # input file -> (exists, rows)
+    top: Optional[int] = 0  # None when the output format can't be line-counted
+    top_exists: bool = False
+
+
+def collect_stats(args, idt_files, idt_result_map):
+    """Probe and count every pipeline output concurrently, once.
+
+    Each probe is a stat plus a bulk count, so on network filesystems
+    the round-trips overlap instead of being paid serially.
+
+    Returns:
+        RunStats with counts for files that exist and zeros otherwise.
+    """
+    probes = []
+    if args.scan_pam:
+        probes.append(("pam", Path(CONFIG.get("OUTPUTS_CRISPR_CANDIDATES")), count_fasta_records))
+        if args.qc:
+            probes.append(("qc", Path(CONFIG.get("OUTPUTS_CRISPR_CANDIDATES_QC")), _qc_counts))
+    for idt_file in idt_files:
+        probes.append((f"idt:{idt_file}", idt_result_map[idt_file], count_csv_rows))
+    # Top guides may be written as parquet/feather (suffix-driven in
+    # select_top_guides); a newline count is meaningless on those, so
+    # only CSV output gets a counter
+    top_path = Path(CONFIG.get("OUTPUTS_TOP_GUIDES"))
+    top_counter = count_csv_rows if top_path.suffix == '.csv' else None
+    probes.append(("top", top_path, top_counter))
+
+    def probe(entry):
+        label, path, counter = entry
+        exists = path.exists()
+        return label, exists, counter(path) if exists and counter is not None else None
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = {label: (exists, count)
+                   for label, exists, count in executor.map(probe, probes)}
+
+    stats = RunStats(targets=count_lines(args.targets))
+    if args.scan_pam:
+        stats.pam_exists, pam = results["pam"]
+        stats.pam = pam or 0
+        if args.qc:
+            stats.qc_exists, qc = results["qc"]
+            stats.qc_pass, stats.qc_fail = qc or (0, 0)
+    for idt_file in idt_files:
+        exists, rows = results[f"idt:{idt_file}"]
+        stats.idt[idt_file] = (exists, rows or 0)
+    stats.top_exists, top = results["top"]
+    if top_counter is None:
+        stats.top = None if stats.top_exists else 0
+    else:
+        stats.top = top or 0
+    return stats
+
+
+def setup_logging(log_file=None, run_ts=None):
     """Set up logging to both file and console."""
     if log_file is None:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = run_ts or datetime.now().strftime("%Y%m%d_%H%M%S")
         log_file = f"crispr_pipeline_{timestamp}.log"
     
     # Create logger
@@ -100,43 +284,46 @@ def setup_logging(log_file=None):
 
 def run_command(cmd, description, logger):
     """Run a command and handle errors."""
-    logger.info(f"Starting step: {description}")
-    logger.debug(f"Command: {' '.join(cmd)}")
-    
+    # Join once; lazy %-style args below defer formatting (and skip it
+    # entirely for records below the handler level, e.g. large DEBUG blobs)
+    cmd_str = ' '.join(cmd)
+    logger.info("Starting step: %s", description)
+    logger.debug("Command: %s", cmd_str)
+
     print(f"\n{'='*60}")
     print(f"STEP: {description}")
     print(f"{'='*60}")
-    print(f"Running: {' '.join(cmd)}")
+    print(f"Running: {cmd_str}")
     print()
-    
+
     try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-        
-        # Log successful execution
-        logger.info(f"Step '{description}' completed successfully")
-        logger.debug(f"Command output:\n{result.stdout}")
-        
-        print(result.stdout)
-        if result.stderr:
-            logger.warning(f"Command stderr: {result.stderr}")
-            print("Warnings/Info:", result.stderr)
-        
+        # Stream output line by line instead of buffering it all in memory:
+        # the user sees progress as it happens and memory stays O(line)
+        # regardless of how much the step prints. stderr is merged into
+        # stdout so the interleaving matches what a terminal would show.
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                text=True, bufsize=1)
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        for line in proc.stdout:
+            print(line, end='')
+            if debug_enabled:
+                logger.debug("%s", line.rstrip())
+        returncode = proc.wait()
+
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, cmd)
+
+        logger.info("Step '%s' completed successfully", description)
         return True
-        
+
     except subprocess.CalledProcessError as e:
-        error_msg = f"Step '{description}' failed with return code {e.returncode}"
-        logger.error(error_msg)
-        logger.error(f"Command: {' '.join(cmd)}")
-        logger.error(f"Return code: {e.returncode}")
-        logger.error(f"Error output: {e.stderr}")
-        logger.error(f"Standard output: {e.stdout}")
-        
+        logger.error("Step '%s' failed with return code %s", description, e.returncode)
+        logger.error("Command: %s", cmd_str)
+
         print(f"❌ Error in {description}:")
-        print(f"Command: {' '.join(cmd)}")
+        print(f"Command: {cmd_str}")
         print(f"Return code: {e.returncode}")
-        print(f"Error output: {e.stderr}")
-        print(f"Standard output: {e.stdout}")
-        
+
         return False
         
     except Exception as e:
@@ -145,10 +332,211 @@ def run_command(cmd, description, logger):
         print(f"❌ Unexpected error in {description}: {e}")
         return False
 
+def run_step(module_name, argv, description, logger):
+    """Run a pipeline step in-process by importing its module and calling main(argv).
+
+    Avoids one interpreter cold-start (plus YAML re-parse and pandas
+    re-import) per step compared to spawning the script as a subprocess.
+    Set GUIDEFORGE_SUBPROCESS=1 to fall back to the old subprocess dispatch.
+    """
+    if os.environ.get("GUIDEFORGE_SUBPROCESS"):
+        return run_command(["python", f"utils/{module_name}.py"] + argv, description, logger)
+
+    logger.info("Starting step: %s", description)
+    logger.debug("Step module: %s, argv: %s", module_name, argv)
+
+    print(f"\n{'='*60}")
+    print(f"STEP: {description}")
+    print(f"{'='*60}")
+    print(f"Running in-process: {module_name} {' '.join(argv)}")
+    print()
+
+    # Capture the step's output so it can be logged like subprocess output
+    # was, then echoed to the console
+    buffer = io.StringIO()
+    try:
+        sys.path.insert(0, str(Path(__file__).parent))
+        with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+            module = importlib.import_module(module_name)
+            module.main(argv)
+    except SystemExit as e:
+        # Steps signal failure via sys.exit; a falsy code is success
+        if e.code:
+            logger.error(f"Step '{description}' exited with code {e.code}")
+            logger.error(f"Step output:\n{buffer.getvalue()}")
+            print(f"❌ Error in {description}:")
+            print(f"Exit code: {e.code}")
+            print(buffer.getvalue())
+            return False
+    except Exception as e:
+        logger.error(f"Unexpected error in step '{description}': {str(e)}", exc_info=True)
+        print(buffer.getvalue())
+        print(f"❌ Unexpected error in {description}: {e}")
+        return False
+
+    logger.info("Step '%s' completed successfully", description)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Step output:\n%s", buffer.getvalue())
+    print(buffer.getvalue())
+    return True
+
+def run_overlapped_scan_and_idt(args, logger):
+    """Overlap UCSC fetching with IDT submission via a producer/consumer queue.
+
+    The serial pipeline pays t_ucsc + t_idt: every target is fetched (with a
+    1s rate-limit sleep each) before the first IDT request goes out. Here the
+    main thread produces per-target candidate batches — fetch flanks, scan,
+    QC — and enqueues the QC survivors while IDT worker threads drain the
+    queue, so IDT's submit/poll latency hides behind UCSC's fetch latency
+    and wall time approaches max(t_ucsc, t_idt). Both stages are I/O bound,
+    so threads are the right grain. Output files are identical to the
+    serial path (upstream/downstream FASTA, QC CSV, candidates FASTA and
+    <candidates>_idt.csv).
+
+    Returns True on success, False if any stage failed fatally.
+    """
+    import queue
+    import threading
+
+    sys.path.insert(0, str(Path(__file__).parent))
+    import get_ucsc_sequences as ucsc
+    import idt_batch_crispr as idt
+    import pandas as pd
+    from qc_ucsc_seq import scan_and_qc
+
+    pam_pattern = CONFIG.get("PAM_SCANNING_PATTERN")
+    if not pam_pattern:
+        print(f"❌ Error: PAM_SCANNING_PATTERN not found in config.yaml")
+        return False
+
+    targets = [line.strip() for line in Path(args.targets).read_text().strip().splitlines()
+               if line.strip() and not line.strip().startswith('#')]
+
+    # Bounded queue keeps the producer from racing arbitrarily far ahead of
+    # the IDT workers; None is the end-of-stream sentinel (one per worker)
+    batches = queue.Queue(maxsize=8)
+    idt_rows = []
+    idt_lock = threading.Lock()
+    n_workers = 2
+
+    def idt_worker():
+        while True:
+            batch = batches.get()
+            if batch is None:
+                batches.task_done()
+                break
+            sequence_map = dict(batch)
+            try:
+                payload = idt.build_payload(batch, logger)
+                if payload:
+                    r = idt.SESSION.post(idt.ENDPOINT_SEARCH, headers=idt.HEADERS,
+                                         json=payload, timeout=idt.TIMEOUT)
+                    if r.status_code == 200:
+                        data = r.json()
+                        lookup = data[0].get("LookupKey") if isinstance(data, list) else None
+                        parsed = idt.parse_response(data, sequence_map, logger)
+                        if (not parsed or all(p[2] is None for p in parsed)) and lookup:
+                            parsed = idt.poll_for_result(lookup, sequence_map, logger)
+                        with idt_lock:
+                            idt_rows.extend(parsed)
+                    else:
+                        logger.error(f"IDT HTTP {r.status_code}: {r.text[:300]}")
+            except Exception as e:
+                logger.error(f"IDT batch failed: {str(e)}")
+            batches.task_done()
+
+    workers = [threading.Thread(target=idt_worker, daemon=True) for _ in range(n_workers)]
+    for worker in workers:
+        worker.start()
+
+    # Producer: fetch, scan and QC each target, feeding survivors to IDT
+    upstream_records, downstream_records = [], []
+    crispr_candidates, qc_results = [], []
+    for line in targets:
+        parsed = ucsc.parse_target(line)
+        if not parsed:
+            print(f"❌ Invalid coordinate format: {line}")
+            continue
+        chrom, start, end, strand = parsed
+        print(f"🔎 Fetching {line} ...")
+        up_seq, down_seq = ucsc.get_flanking_sequences(chrom, start, end, strand=strand)
+
+        safe_label = line.replace(":", "_").replace("+", "plus")
+        scan_names, scan_seqs = [], []
+        if up_seq:
+            upstream_records.append((f"{line}_upstream", up_seq))
+            scan_names.append(f"{safe_label}_upstream")
+            scan_seqs.append(up_seq)
+        if down_seq:
+            downstream_records.append((f"{line}_downstream", down_seq))
+            scan_names.append(f"{safe_label}_downstream")
+            scan_seqs.append(down_seq)
+
+        if scan_seqs:
+            candidates, rows = scan_and_qc(scan_seqs, scan_names, pam_pattern)
+            crispr_candidates.extend(candidates)
+            qc_results.extend(rows)
+            passed = [(row[1], row[2]) for row in rows if row[5].startswith("Pass")]
+            batch_size = args.batch_size or idt.BATCH_SIZE
+            for i in range(0, len(passed), batch_size):
+                batches.put(passed[i:i + batch_size])
+
+        time.sleep(1.0)  # UCSC API rate limit
+
+    for _ in workers:
+        batches.put(None)
+    for worker in workers:
+        worker.join()
+
+    # Write the same outputs the serial stages produce
+    def write_fasta(records, filename):
+        if not records:
+            print(f"⚠️  No sequences written to {filename}")
+            return
+        with open(filename, "w") as f:
+            for name, seq in records:
+                f.write(f">{name}\n{seq}\n")
+        print(f"✅ Saved {filename} ({len(records)} sequences)")
+
+    write_fasta(upstream_records, CONFIG.get("OUTPUTS_UPSTREAM_SEQUENCES"))
+    write_fasta(downstream_records, CONFIG.get("OUTPUTS_DOWNSTREAM_SEQUENCES"))
+
+    qc_output = CONFIG.get("OUTPUTS_CRISPR_CANDIDATES_QC")
+    with open(qc_output, "w", buffering=1 << 20) as f:
+        f.write("parent,name,spacer,pam,strand,qc_status,gc_content,poly_t,homopolymer,restriction_sites,excluded_motifs\n")
+        f.writelines(",".join(row) + "\n" for row in qc_results)
+    passed_total = sum(1 for row in qc_results if row[5].startswith("Pass"))
+    print(f"✅ Saved {qc_output} ({passed_total}/{len(qc_results)} candidates passed QC)")
+
+    candidates_file = CONFIG.get("OUTPUTS_CRISPR_CANDIDATES")
+    ucsc.write_pam_fasta(crispr_candidates, candidates_file, qc_results)
+
+    if not idt_rows:
+        logger.error("No IDT results produced by overlapped pipeline")
+        print("❌ No IDT results. Check your session cookie in config.yaml")
+        return False
+
+    # Final IDT CSV in the same shape process_file writes
+    df = pd.DataFrame(idt_rows, columns=["sequence_name", "dna_sequence", "on_target_score",
+                                         "off_target_score", "on_plus_off"])
+    df['parent_sequence'] = df['sequence_name'].str.rsplit('_', n=1).str[0]
+    df['rank_within_parent'] = df.groupby('parent_sequence')['on_plus_off'].rank(
+        method='dense', ascending=False).astype(int)
+    df = df.sort_values(['parent_sequence', 'rank_within_parent'])
+    df = df[['parent_sequence', 'rank_within_parent', 'sequence_name', 'dna_sequence',
+             'on_target_score', 'off_target_score', 'on_plus_off']]
+    out_csv = f"{Path(candidates_file).stem}_idt.csv"
+    df.to_csv(out_csv, index=False)
+    logger.info(f"Saved final results: {out_csv} ({len(df)} sequences)")
+    print(f"✅ Saved {out_csv} ({len(df)} sequences)")
+    return True
+
 def main():
-    # Record start time for runtime tracking
+    # Record start time for runtime tracking; one timestamp names both the
+    # log file and the manifest so a run's artifacts correlate trivially
     start_time = time.time()
-    
+    run_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+
     parser = argparse.ArgumentParser(
         description="Complete CRISPR target automation pipeline",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -189,8 +577,12 @@ Examples:
     # Output file names are now configured in config.yaml (no CLI overrides for manifest integrity)
     
     # Control options
-    parser.add_argument("--select-guides", action="store_true", 
+    parser.add_argument("--select-guides", action="store_true",
                        help="Select top guides based on policy parameters (default: disabled)")
+    parser.add_argument("--overlap-idt", action="store_true",
+                       help="Overlap UCSC fetching with IDT submission (requires --scan-pam --qc)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                       help="Sequences per IDT request (default: IDT_BATCH_SIZE from config.yaml)")
     parser.add_argument("--cleanup", action="store_true", 
                        help="Remove intermediate files after completion")
     parser.add_argument("--log-file", 
@@ -199,7 +591,7 @@ Examples:
     args = parser.parse_args()
     
     # Set up logging
-    logger, log_file = setup_logging(args.log_file)
+    logger, log_file = setup_logging(args.log_file, run_ts)
     logger.info("Starting CRISPR Target Automation Pipeline")
     logger.info(f"Command line arguments: {sys.argv}")
     logger.info(f"Configuration loaded: {len(CONFIG)} settings")
@@ -212,15 +604,22 @@ Examples:
         sys.exit(1)
     
     logger.info(f"Input file validated: {args.targets}")
+
+    # Preload the manifest phase's heavy imports (pandas alone is several
+    # hundred ms) in a background thread so they overlap the network-bound
+    # pipeline steps instead of delaying the final summary
+    sys.path.insert(0, str(Path(__file__).parent))
+    preload = threading.Thread(
+        target=lambda: (importlib.import_module('pandas'),
+                        importlib.import_module('manifest')),
+        daemon=True)
+    preload.start()
     
     print("🧬 CRISPR Target Automation Pipeline")
     print("=" * 50)
     print(f"Input file: {args.targets}")
     # Validate required config keys
-    required_config_keys = ['UCSC_UPSTREAM_DISTANCE', 'UCSC_DOWNSTREAM_DISTANCE', 'UCSC_GENOME_ASSEMBLY']
-    required_output_keys = ['OUTPUTS_UPSTREAM_SEQUENCES', 'OUTPUTS_DOWNSTREAM_SEQUENCES', 'OUTPUTS_CRISPR_CANDIDATES', 
-                           'OUTPUTS_CRISPR_CANDIDATES_QC', 'OUTPUTS_TOP_GUIDES']
-    missing_keys = [key for key in required_config_keys + required_output_keys if key not in CONFIG]
+    missing_keys = sorted((REQUIRED_CONFIG_KEYS | REQUIRED_OUTPUT_KEYS) - CONFIG.keys())
     if missing_keys:
         print(f"❌ Error: Missing required configuration keys in config.yaml:")
         for key in missing_keys:
@@ -235,10 +634,7 @@ Examples:
         print("🔍 PAM scanning: ENABLED (SpCas9 NGG)")
     if args.qc:
         # Validate required QC policy keys
-        required_qc_keys = ['POLICY_QUALITY_CONTROL_GC_MIN', 'POLICY_QUALITY_CONTROL_GC_MAX', 
-                           'POLICY_QUALITY_CONTROL_MAX_POLY_T', 'POLICY_QUALITY_CONTROL_MAX_HOMOPOLYMER',
-                           'POLICY_QUALITY_CONTROL_RESTRICTION_SITES']
-        missing_qc_keys = [key for key in required_qc_keys if key not in CONFIG]
+        missing_qc_keys = sorted(REQUIRED_QC_KEYS - CONFIG.keys())
         if missing_qc_keys:
             print(f"❌ Error: Missing required QC policy keys in policy.yaml:")
             for key in missing_qc_keys:
@@ -267,30 +663,44 @@ Examples:
         max_homopolymer = CONFIG.get("POLICY_QUALITY_CONTROL_MAX_HOMOPOLYMER")
         logger.info(f"  QC parameters: GC {gc_min:.2f}-{gc_max:.2f}, max poly-T {max_poly_t}, max homopolymer {max_homopolymer}")
     
-    # Step 1: Fetch sequences from UCSC with optional PAM scanning and QC
-    ucsc_cmd = [
-        "python", "utils/get_ucsc_sequences.py", args.targets,
-        "--retries", str(args.retries)
-    ]
-    
-    # Add PAM scanning and QC options if requested
-    if args.scan_pam:
-        ucsc_cmd.extend(["--scan-pam"])
-    if args.qc:
-        ucsc_cmd.extend(["--qc"])
-    
-    if not run_command(ucsc_cmd, "Fetching sequences from UCSC", logger):
-        logger.error("UCSC sequence fetching failed. Pipeline terminated.")
-        print("❌ UCSC sequence fetching failed. Exiting.")
-        sys.exit(1)
-    
-    # Determine what files to analyze with IDT
+    # Overlapped mode fuses steps 1 and 2 behind a producer/consumer queue;
+    # it needs QC'd candidates to feed IDT, so it requires --scan-pam --qc
+    overlapped = args.overlap_idt and args.scan_pam and args.qc
+    if args.overlap_idt and not overlapped:
+        print("⚠️  --overlap-idt requires --scan-pam --qc; running stages serially")
+
+    if overlapped:
+        print(f"\n{'='*60}")
+        print("STEP: Fetching sequences from UCSC + IDT analysis (overlapped)")
+        print(f"{'='*60}")
+        if not run_overlapped_scan_and_idt(args, logger):
+            logger.error("Overlapped UCSC/IDT pipeline failed. Pipeline terminated.")
+            print("❌ Overlapped UCSC/IDT pipeline failed. Exiting.")
+            sys.exit(1)
+    else:
+        # Step 1: Fetch sequences from UCSC with optional PAM scanning and QC
+        ucsc_argv = [args.targets, "--retries", str(args.retries)]
+
+        # Add PAM scanning and QC options if requested
+        if args.scan_pam:
+            ucsc_argv.extend(["--scan-pam"])
+        if args.qc:
+            ucsc_argv.extend(["--qc"])
+
+        if not run_step("get_ucsc_sequences", ucsc_argv, "Fetching sequences from UCSC", logger):
+            logger.error("UCSC sequence fetching failed. Pipeline terminated.")
+            print("❌ UCSC sequence fetching failed. Exiting.")
+            sys.exit(1)
+
+    # Determine what files to analyze with IDT; one directory snapshot
+    # covers all the step-1 output checks
     idt_files = []
-    
+    cwd_files = cwd_file_names()
+
     # Check for PAM candidates first (if PAM scanning was enabled)
     if args.scan_pam:
         candidates_file = CONFIG.get("OUTPUTS_CRISPR_CANDIDATES")
-        if Path(candidates_file).exists():
+        if in_cwd_snapshot(candidates_file, cwd_files):
             logger.info(f"Found PAM candidates file: {candidates_file}")
             print(f"🔍 Found PAM candidates: {candidates_file}")
             idt_files.append(candidates_file)
@@ -301,9 +711,9 @@ Examples:
     else:
         upstream_file = CONFIG.get("OUTPUTS_UPSTREAM_SEQUENCES")
         downstream_file = CONFIG.get("OUTPUTS_DOWNSTREAM_SEQUENCES")
-        
-        upstream_exists = Path(upstream_file).exists()
-        downstream_exists = Path(downstream_file).exists()
+
+        upstream_exists = in_cwd_snapshot(upstream_file, cwd_files)
+        downstream_exists = in_cwd_snapshot(downstream_file, cwd_files)
         
         logger.info(f"Checking sequence files: upstream={upstream_exists}, downstream={downstream_exists}")
         
@@ -332,21 +742,26 @@ Examples:
     
     logger.info(f"Files selected for IDT analysis: {idt_files}")
     
-    # Step 2: Analyze with IDT
-    idt_cmd = ["python", "utils/idt_batch_crispr.py"] + idt_files
-    
-    if not run_command(idt_cmd, "Analyzing sequences with IDT", logger):
-        logger.error("IDT analysis failed. Pipeline terminated.")
-        print("❌ IDT analysis failed. Check your session cookie in config.yaml")
-        print(f"📝 Check log file for detailed error information: {log_file}")
-        sys.exit(1)
+    # Step 2: Analyze with IDT (already done when stages were overlapped)
+    if not overlapped:
+        idt_argv = list(idt_files)
+        if args.batch_size:
+            idt_argv.extend(["--batch-size", str(args.batch_size)])
+        if not run_step("idt_batch_crispr", idt_argv, "Analyzing sequences with IDT", logger):
+            logger.error("IDT analysis failed. Pipeline terminated.")
+            print("❌ IDT analysis failed. Check your session cookie in config.yaml")
+            print(f"📝 Check log file for detailed error information: {log_file}")
+            sys.exit(1)
+
+    # Resolve each input's IDT result path once; guide selection, the
+    # summary and the manifest all reuse this map instead of rebuilding
+    # Path(f).stem strings (and re-stat'ing) at every site
+    idt_result_map = {f: Path(f"{Path(f).stem}_idt.csv") for f in idt_files}
     
     # Step 3: Select top guides based on policy (optional)
     if args.select_guides:
         # Validate required guide selection policy keys
-        required_guide_keys = ['POLICY_GUIDE_SELECTION_MIN_ON_TARGET_SCORE', 'POLICY_GUIDE_SELECTION_MIN_OFF_TARGET_SCORE',
-                              'POLICY_GUIDE_SELECTION_NUM_GUIDES_PER_GENE', 'POLICY_GUIDE_SELECTION_ACCEPTED_PAMS']
-        missing_guide_keys = [key for key in required_guide_keys if key not in CONFIG]
+        missing_guide_keys = sorted(REQUIRED_GUIDE_KEYS - CONFIG.keys())
         if missing_guide_keys:
             print(f"❌ Error: Missing required guide selection policy keys in policy.yaml:")
             for key in missing_guide_keys:
@@ -354,13 +769,14 @@ Examples:
             print(f"\n💡 Please add these keys to your policy.yaml file.")
             sys.exit(1)
         
-        idt_results = [f"{Path(f).stem}_idt.csv" for f in idt_files if Path(f"{Path(f).stem}_idt.csv").exists()]
+        cwd_files = cwd_file_names()
+        idt_results = [str(path) for path in idt_result_map.values()
+                       if in_cwd_snapshot(path, cwd_files)]
         
         if idt_results:
             print(f"\n🎯 Selecting top guides from {len(idt_results)} IDT result files...")
-            select_cmd = ["python", "utils/select_top_guides.py"] + idt_results
-            
-            if not run_command(select_cmd, "Selecting top guides", logger):
+
+            if not run_step("select_top_guides", idt_results, "Selecting top guides", logger):
                 logger.warning("Guide selection failed, but IDT results are still available")
                 print("⚠️  Guide selection failed, but IDT results are still available")
             else:
@@ -372,48 +788,47 @@ Examples:
         logger.info("Guide selection skipped (use --select-guides to enable)")
         print("ℹ️  Guide selection skipped (use --select-guides to enable)")
     
+    # Count every output once; the summary below and the manifest both
+    # read from this object instead of re-probing the files
+    stats = collect_stats(args, idt_files, idt_result_map)
+
     # Step 4: Summary
     print(f"\n{'='*60}")
     print("PIPELINE SUMMARY")
     print(f"{'='*60}")
-    
+
     # Show PAM scanning results if enabled
     if args.scan_pam:
         candidates_file = CONFIG.get("OUTPUTS_CRISPR_CANDIDATES")
-        if Path(candidates_file).exists():
-            with open(candidates_file, 'r') as f:
-                pam_count = sum(1 for line in f if line.startswith('>'))
-            print(f"🔍 PAM candidates: {candidates_file} ({pam_count} sites)")
-        
+        if stats.pam_exists:
+            print(f"🔍 PAM candidates: {candidates_file} ({stats.pam} sites)")
+
         if args.qc:
             qc_file = CONFIG.get("OUTPUTS_CRISPR_CANDIDATES_QC")
-            if Path(qc_file).exists():
-                with open(qc_file, 'r') as f:
-                    qc_count = sum(1 for line in f) - 1  # Subtract header
-                print(f"🔬 QC results: {qc_file} ({qc_count} candidates)")
-    
+            if stats.qc_exists:
+                print(f"🔬 QC results: {qc_file} ({stats.qc_pass + stats.qc_fail} candidates)")
+
     # Show IDT analysis results
     for idt_file in idt_files:
-        idt_results = f"{Path(idt_file).stem}_idt.csv"
-        if Path(idt_results).exists():
-            with open(idt_results, 'r') as f:
-                idt_count = sum(1 for line in f) - 1  # Subtract header
-            print(f"✅ IDT results: {idt_results} ({idt_count} sequences)")
+        exists, idt_count = stats.idt[idt_file]
+        if exists:
+            print(f"✅ IDT results: {idt_result_map[idt_file]} ({idt_count} sequences)")
         else:
             print(f"⚠️  Input file: {idt_file} (no IDT results)")
-    
+
     # Show top guides selection results
     top_guides_file = CONFIG.get("OUTPUTS_TOP_GUIDES")
-    if Path(top_guides_file).exists():
-        with open(top_guides_file, 'r') as f:
-            top_count = sum(1 for line in f) - 1  # Subtract header
-        print(f"🏆 Top guides: {top_guides_file} ({top_count} selected)")
+    if stats.top_exists:
+        if stats.top is None:
+            print(f"🏆 Top guides: {top_guides_file}")
+        else:
+            print(f"🏆 Top guides: {top_guides_file} ({stats.top} selected)")
     else:
         if not args.select_guides:
             print(f"ℹ️  Top guides: Not generated (use --select-guides to enable)")
         else:
             # Check if IDT results exist
-            idt_results_exist = any(Path(f"{Path(f).stem}_idt.csv").exists() for f in idt_files)
+            idt_results_exist = any(exists for exists, _ in stats.idt.values())
             if not idt_results_exist:
                 print(f"ℹ️  Top guides: Not generated (no IDT results available)")
             else:
@@ -425,75 +840,40 @@ Examples:
         files_to_remove = [CONFIG.get("OUTPUTS_UPSTREAM_SEQUENCES"), CONFIG.get("OUTPUTS_DOWNSTREAM_SEQUENCES")]
         if args.scan_pam:
             files_to_remove.append(CONFIG.get("OUTPUTS_CRISPR_CANDIDATES"))
+        cwd_files = cwd_file_names()
         for file in files_to_remove:
-            if Path(file).exists():
+            if in_cwd_snapshot(file, cwd_files):
                 Path(file).unlink()
                 print(f"   Removed: {file}")
     
     # Auto-generate manifest
     print(f"\n📋 Generating manifest for reproducibility...")
     try:
-        sys.path.insert(0, str(Path(__file__).parent))
+        # Imports resolve from sys.modules once the preload thread finishes
+        preload.join()
         from manifest import write_manifest
-        import glob
-        import pandas as pd
-        
-        # Auto-capture QC stats from specific QC files generated by this pipeline
-        qc_files = []
-        total_passed_qc = 0
-        total_failed_qc = 0
-        
-        # Only check the QC file that was actually generated by this run
-        if args.qc:
-            qc_file = CONFIG.get("OUTPUTS_CRISPR_CANDIDATES_QC")
-            if Path(qc_file).exists():
-                qc_files.append(qc_file)
-        
-        for qc_file in qc_files:
-            try:
-                df = pd.read_csv(qc_file)
-                passed = len(df[df['qc_status'].str.startswith('Pass', na=False)])
-                failed = len(df) - passed
-                total_passed_qc += passed
-                total_failed_qc += failed
-            except Exception as e:
-                print(f"   ⚠️  Could not read QC file {qc_file}: {e}")
-        
-        # Count PAM candidates if available
-        pam_candidates_count = 0
-        if args.scan_pam:
-            candidates_file = CONFIG.get("OUTPUTS_CRISPR_CANDIDATES")
-            if Path(candidates_file).exists():
-                with open(candidates_file, 'r') as f:
-                    pam_candidates_count = sum(1 for line in f if line.startswith('>'))
-        
-        # Count IDT results
-        idt_results_count = 0
-        for idt_file in idt_files:
-            idt_results = f"{Path(idt_file).stem}_idt.csv"
-            if Path(idt_results).exists():
-                with open(idt_results, 'r') as f:
-                    idt_results_count += sum(1 for line in f) - 1  # Subtract header
-        
+
         # Calculate total runtime
         total_runtime_sec = round(time.time() - start_time, 2)
         
-        # Get species mapping information for manifest
-        from idt_batch_crispr import species_map
+        # Get species mapping information for manifest (species_map has no
+        # heavy imports, unlike the IDT module it used to come from)
+        from species_map import SPECIES_MAP
         ucsc_assembly = CONFIG.get("UCSC_GENOME_ASSEMBLY")
-        idt_species, idt_assembly = species_map.get(ucsc_assembly, ("unknown", "unknown"))
+        idt_species, idt_assembly = SPECIES_MAP.get(ucsc_assembly, ("unknown", "unknown"))
         
-        # Generate manifest with all stats
+        # Generate manifest from the same stats the summary printed
+        total_qc = stats.qc_pass + stats.qc_fail
         summary_stats = {
             "pipeline_type": "full_automation",
-            "targets_processed": len(open(args.targets, 'r').readlines()),
-            "pam_candidates_found": pam_candidates_count,
-            "qc_files_found": len(qc_files),
-            "total_passed_qc": total_passed_qc,
-            "total_failed_qc": total_failed_qc,
-            "qc_pass_rate": round(total_passed_qc/(total_passed_qc + total_failed_qc), 3) if (total_passed_qc + total_failed_qc) > 0 else 0,
+            "targets_processed": stats.targets,
+            "pam_candidates_found": stats.pam,
+            "qc_files_found": int(stats.qc_exists),
+            "total_passed_qc": stats.qc_pass,
+            "total_failed_qc": stats.qc_fail,
+            "qc_pass_rate": round(stats.qc_pass/total_qc, 3) if total_qc > 0 else 0,
             "idt_files_processed": len(idt_files),
-            "idt_results_generated": idt_results_count,
+            "idt_results_generated": sum(rows for exists, rows in stats.idt.values() if exists),
             "genome_assembly": CONFIG.get("UCSC_GENOME_ASSEMBLY"),
             "idt_species": idt_species,
             "idt_genome_assembly": idt_assembly,
@@ -506,7 +886,7 @@ Examples:
             "total_runtime_sec": total_runtime_sec
         }
         
-        manifest_file = f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}_manifest.json"
+        manifest_file = f"run_{run_ts}_manifest.json"
         # Use absolute paths to ensure we find the config files
         config_path = Path(__file__).parent.parent / "config.yaml"
         policy_path = Path(__file__).parent.parent / "policy.yaml"
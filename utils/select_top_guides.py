@@ -15,133 +15,353 @@ Examples:
 """
 
 import argparse
-import pandas as pd
-import yaml
+import os
+import pickle
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+# The numeric stack (numpy, pandas, optional accelerators) imports in
+# _import_heavy() after argparse succeeds, so --help and usage-error
+# invocations don't pay pandas' several-hundred-ms import cost; yaml
+# loads inside load_config() and only on a config cache miss
+np = None
+pd = None
+_pacsv = None
+_njit = None
+
+
+def _import_heavy():
+    """Import numpy/pandas and the optional accelerators, once.
+
+    Called from main() after argument parsing; safe to call repeatedly.
+    """
+    global np, pd, _pacsv, _njit, _topk_per_parent
+    if pd is not None:
+        return
+
+    import numpy
+    np = numpy
+
+    # Opt-in FireDucks acceleration: an API-compatible pandas replacement
+    # whose lazy engine runs the read → filter → groupby pipeline
+    # multithreaded with no other code changes. Off by default; falls
+    # back to pandas when unset or not installed
+    if os.environ.get('GUIDEFORGE_FIREDUCKS') == '1':
+        try:
+            import fireducks.pandas as pandas_mod
+        except ImportError:
+            import pandas as pandas_mod
+    else:
+        import pandas as pandas_mod
+    pd = pandas_mod
+
+    # Optional: pyarrow parses CSV multithreaded in C++ and is noticeably
+    # faster than the pandas C engine on multi-MB IDT result files; fall
+    # back to pandas when it isn't installed
+    try:
+        import pyarrow.csv as pacsv
+        _pacsv = pacsv
+    except ImportError:
+        pass
+
+    # Optional: numba compiles the per-parent top-k selection into one
+    # tight loop over the score array; otherwise nlargest is used
+    try:
+        from numba import njit
+        _njit = njit
+        _topk_per_parent = njit(cache=True)(_topk_per_parent)
+    except ImportError:
+        pass
+
+
+def _topk_per_parent(comb, pcodes, k, nparents):
+    """Per-parent top-k row indices in a single pass over the scores.
+
+    Keeps a bounded, ascending top-k buffer per parent (k is tiny, so
+    insertion beats heap bookkeeping). Boundary ties keep the earlier
+    row, matching nlargest's keep='first'. Returns an (nparents, k)
+    index array with -1 in unused slots.
+    """
+    best = np.full((nparents, k), -np.inf, dtype=np.float32)
+    idxs = np.full((nparents, k), -1, dtype=np.int64)
+    for i in range(comb.shape[0]):
+        p = pcodes[i]
+        if p < 0:
+            continue
+        v = comb[i]
+        if v <= best[p, 0]:
+            continue
+        # evict the smallest, bubble v up to keep the buffer ascending
+        j = 0
+        while j + 1 < k and v > best[p, j + 1]:
+            best[p, j] = best[p, j + 1]
+            idxs[p, j] = idxs[p, j + 1]
+            j += 1
+        best[p, j] = v
+        idxs[p, j] = i
+    return idxs
+
+
+# Flattened-config disk cache, keyed on the mtimes of both YAML files so
+# edits invalidate it automatically
+_CONFIG_CACHE = Path.home() / ".cache" / "guideforge" / "select_config.pkl"
+
+
+def _yaml_mtimes(*paths):
+    """Snapshot (path, mtime_ns or None) pairs for the config cache key."""
+    return tuple((str(p), p.stat().st_mtime_ns if p.exists() else None)
+                 for p in paths)
+
+
+def _flatten(d):
+    """Flatten nested config dicts into UPPERCASE underscore-joined keys.
+
+    Iterative with an explicit stack, so deep policy trees fill one
+    output dict instead of allocating and merging a dict per level.
+    """
+    flattened = {}
+    stack = [('', d)]
+    while stack:
+        prefix, current = stack.pop()
+        for key, value in current.items():
+            new_key = key.upper() if not prefix else prefix + '_' + key.upper()
+            if isinstance(value, dict):
+                stack.append((new_key, value))
+            else:
+                flattened[new_key] = value
+    return flattened
+
+
 def load_config():
     """Load configuration from config.yaml and policy.yaml files."""
     config_file = Path(__file__).parent.parent / "config.yaml"
     if not config_file.exists():
         print("Error: config.yaml not found.")
         sys.exit(1)
-    
+
+    # Fast path: reuse the flattened dict cached on disk when neither YAML
+    # file has changed since it was written
+    try:
+        with open(_CONFIG_CACHE, "rb") as f:
+            key, flattened = pickle.load(f)
+        if key == _yaml_mtimes(*(Path(p) for p, _ in key)):
+            return flattened
+    except (OSError, EOFError, ValueError, pickle.PickleError):
+        pass
+
+    # Cache miss: only now pay for PyYAML. Prefer the libyaml C loader
+    # (several times faster); fall back to the pure-Python loader when
+    # PyYAML was built without libyaml
+    import yaml
+    try:
+        from yaml import CSafeLoader as _YamlLoader
+    except ImportError:
+        from yaml import SafeLoader as _YamlLoader
+
     with open(config_file, 'r') as f:
-        config = yaml.safe_load(f)
-    
+        config = yaml.load(f, Loader=_YamlLoader)
+
     # Load policy file if specified
     policy_file = config.get('policy_file', './policy.yaml')
     policy_path = Path(__file__).parent.parent / policy_file
-    
+
     if policy_path.exists():
         with open(policy_path, 'r') as f:
-            policy = yaml.safe_load(f)
-        
+            policy = yaml.load(f, Loader=_YamlLoader)
+
         # Merge policy into config
         config['policy'] = policy
-    
+
     # Flatten the nested structure for backward compatibility
-    def flatten_dict(d, prefix=''):
-        flattened = {}
-        for key, value in d.items():
-            new_key = f'{prefix}_{key.upper()}' if prefix else key.upper()
-            if isinstance(value, dict):
-                flattened.update(flatten_dict(value, new_key))
-            else:
-                flattened[new_key] = value
-        return flattened
-    
-    return flatten_dict(config)
+    flattened = _flatten(config)
+
+    # Freeze the accepted PAM list once so every isin() call reuses a
+    # prebuilt hash set instead of rebuilding one from a Python list
+    flattened['POLICY_GUIDE_SELECTION_ACCEPTED_PAMS'] = frozenset(
+        flattened.get('POLICY_GUIDE_SELECTION_ACCEPTED_PAMS') or ())
+
+    # Cache write is best-effort: a read-only home dir just skips caching
+    try:
+        _CONFIG_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        with open(_CONFIG_CACHE, "wb") as f:
+            pickle.dump((_yaml_mtimes(config_file, policy_path), flattened), f)
+    except OSError:
+        pass
+
+    return flattened
 
 CONFIG = load_config()
 
-def load_idt_results(file_path):
-    """Load IDT results from CSV file."""
+# Columns the selection pipeline reads or writes back out; anything else
+# in an IDT export is dropped at parse time. Scores load as float32 (half
+# the memory traffic of float64, plenty for 0-100 scores) and the
+# low-cardinality label columns load as category
+_REQUIRED_COLS = frozenset({
+    'parent_sequence', 'rank_within_parent', 'sequence_name', 'dna_sequence',
+    'on_target_score', 'off_target_score', 'on_plus_off', 'pam'})
+_DTYPES = {'on_target_score': 'float32', 'off_target_score': 'float32',
+           'on_plus_off': 'float32', 'pam': 'category', 'parent_sequence': 'category'}
+
+
+# Rows per read_csv chunk when filtering during load; large enough to
+# amortize parser startup, small enough to bound peak memory
+_CHUNK_ROWS = 200_000
+
+
+def load_idt_results(file_path, config=None):
+    """Load IDT results from CSV file, optionally filtering during the read.
+
+    With a config, the selection filters run on each parsed chunk so rows
+    that fail the score/PAM thresholds never accumulate in memory; peak
+    usage is one chunk plus the survivors instead of the whole file.
+
+    Returns:
+        Tuple of (DataFrame or None on error, total rows parsed).
+    """
     try:
-        df = pd.read_csv(file_path)
-        print(f"📖 Loaded {len(df)} sequences from {file_path}")
-        return df
+        if _pacsv is not None:
+            # Parquet sidecar: guide selection is typically re-run against
+            # the same IDT export with tweaked policy thresholds, so cache
+            # the typed columns next to the CSV and skip text parsing on
+            # repeat runs. Stale sidecars (older than the CSV) are rebuilt
+            pq_path = Path(file_path).with_suffix('.parquet')
+            src = Path(file_path)
+            if pq_path.exists() and pq_path.stat().st_mtime_ns >= src.stat().st_mtime_ns:
+                df = pd.read_parquet(pq_path, engine='pyarrow')
+            else:
+                # pyarrow parses the whole file multithreaded; filter once after
+                df = _pacsv.read_csv(str(file_path)).to_pandas()
+                df = df[[c for c in df.columns if c in _REQUIRED_COLS]]
+                df = df.astype({c: t for c, t in _DTYPES.items() if c in df.columns})
+                # Cache write is best-effort; a read-only directory just skips it
+                try:
+                    df.to_parquet(pq_path, engine='pyarrow', compression='zstd', index=False)
+                except (OSError, ValueError):
+                    pass
+            total_rows = len(df)
+            if config is not None:
+                df = df.loc[_selection_mask(df, config)]
+        elif config is not None:
+            kept = []
+            total_rows = 0
+            for chunk in pd.read_csv(file_path, usecols=lambda c: c in _REQUIRED_COLS,
+                                     dtype=_DTYPES, engine='c', chunksize=_CHUNK_ROWS):
+                total_rows += len(chunk)
+                kept.append(chunk.loc[_selection_mask(chunk, config)])
+            df = kept[0] if len(kept) == 1 else pd.concat(kept, ignore_index=True)
+        else:
+            df = pd.read_csv(file_path, usecols=lambda c: c in _REQUIRED_COLS,
+                             dtype=_DTYPES, engine='c')
+            total_rows = len(df)
+
+        if config is not None:
+            print(f"📖 Loaded {total_rows} sequences from {file_path} ({len(df)} passed filters)")
+        else:
+            print(f"📖 Loaded {total_rows} sequences from {file_path}")
+        return df, total_rows
     except Exception as e:
         print(f"❌ Error loading {file_path}: {e}")
-        return None
+        return None, 0
 
-def apply_guide_selection_filters(df, config):
-    """Apply guide selection filters based on policy parameters."""
-    print("🔍 Applying guide selection filters...")
-    
-    original_count = len(df)
-    
+def _selection_mask(df, config, verbose=False):
+    """Boolean mask of rows passing the guide selection policy filters.
+
+    Shared by the whole-frame filter below and the chunk-wise filtering
+    in load_idt_results, which runs it quietly per chunk.
+    """
     # Get policy parameters
     min_on_target = config.get("POLICY_GUIDE_SELECTION_MIN_ON_TARGET_SCORE")
     min_off_target = config.get("POLICY_GUIDE_SELECTION_MIN_OFF_TARGET_SCORE")
     accepted_pams = config.get("POLICY_GUIDE_SELECTION_ACCEPTED_PAMS", [])
-    
-    # Filter by on-target score
+
+    # Fuse the criteria into one boolean mask so the frame is sliced a
+    # single time at the end, instead of materializing and re-indexing an
+    # intermediate DataFrame per filter
+    mask = np.ones(len(df), dtype=bool)
+
+    # Both numeric thresholds go through one df.eval expression; with
+    # numexpr installed pandas compiles it into a single fused loop over
+    # the score columns instead of allocating a boolean temporary per
+    # comparison (higher is better for IDT off_target_score)
+    # float32 threshold scalars keep the comparison in float32; a Python
+    # float would upcast the whole score column to float64 first,
+    # doubling the bytes moved per compare
+    terms, labels, local_dict = [], [], {}
     if min_on_target is not None:
-        df = df[df['on_target_score'] >= min_on_target]
-        print(f"   On-target score ≥ {min_on_target}: {len(df)} sequences")
-    
-    # Filter by off-target score (higher is better for IDT off_target_score)
+        terms.append('on_target_score >= @min_on')
+        labels.append(f"on-target ≥ {min_on_target}")
+        local_dict['min_on'] = np.float32(min_on_target)
     if min_off_target is not None:
-        df = df[df['off_target_score'] >= min_off_target]
-        print(f"   Off-target score ≥ {min_off_target}: {len(df)} sequences")
-    
-    # Filter by PAM sites (if PAM information is available)
+        terms.append('off_target_score >= @min_off')
+        labels.append(f"off-target ≥ {min_off_target}")
+        local_dict['min_off'] = np.float32(min_off_target)
+    if terms:
+        mask &= df.eval(' & '.join(terms), local_dict=local_dict).to_numpy()
+        if verbose:
+            print(f"   Score thresholds ({', '.join(labels)}): {int(mask.sum())} sequences")
+
+    # Filter by PAM sites (if PAM information is available); string set
+    # membership stays outside eval, which only handles numeric terms
     if accepted_pams and 'pam' in df.columns:
-        df = df[df['pam'].isin(accepted_pams)]
-        print(f"   Accepted PAMs {accepted_pams}: {len(df)} sequences")
-    
+        mask &= df['pam'].isin(accepted_pams).to_numpy()
+        if verbose:
+            print(f"   Accepted PAMs {sorted(accepted_pams)}: {int(mask.sum())} sequences")
+
+    return mask
+
+def apply_guide_selection_filters(df, config):
+    """Apply guide selection filters based on policy parameters."""
+    print("🔍 Applying guide selection filters...")
+
+    original_count = len(df)
+    df = df.loc[_selection_mask(df, config, verbose=True)]
     filtered_count = len(df)
     print(f"   Filtered: {original_count} → {filtered_count} sequences ({filtered_count/original_count*100:.1f}% passed)")
-    
+
     return df
 
 def select_top_guides(df, config):
     """Select top guides based on policy parameters."""
     print("🏆 Selecting top guides...")
     
-    # Get policy parameters
+    # Get policy parameters. min_spacing_bp is intentionally not read
+    # here: spacing needs genomic coordinates, which IDT results lack
     num_guides_per_gene = config.get("POLICY_GUIDE_SELECTION_NUM_GUIDES_PER_GENE", 5)
-    min_spacing = config.get("POLICY_GUIDE_SELECTION_MIN_SPACING_BP", 30)
-    
-    # Sort by combined score (on_plus_off) descending
-    df = df.sort_values('on_plus_off', ascending=False)
-    
+
     # If we have parent sequence information, select top guides per parent
     if 'parent_sequence' in df.columns:
-        top_guides = []
-        
-        for parent in df['parent_sequence'].unique():
-            parent_guides = df[df['parent_sequence'] == parent].copy()
-            
-            # Select top guides for this parent sequence
-            selected = []
-            for _, guide in parent_guides.iterrows():
-                if len(selected) >= num_guides_per_gene:
-                    break
-                
-                # Check spacing from previously selected guides
-                if min_spacing > 0 and len(selected) > 0:
-                    # This is a simplified spacing check - in practice you'd need genomic coordinates
-                    # For now, we'll just take the top N guides per parent
-                    pass
-                
-                selected.append(guide)
-            
-            top_guides.extend(selected)
-            print(f"   {parent}: selected {len(selected)} guides")
-        
-        result_df = pd.DataFrame(top_guides)
+        if _njit is not None and isinstance(df['parent_sequence'].dtype, pd.CategoricalDtype):
+            # Compiled kernel: one sweep over the float32 scores and the
+            # int category codes, no groupby machinery at all
+            comb = df['on_plus_off'].to_numpy(np.float32)
+            pcodes = df['parent_sequence'].cat.codes.to_numpy(np.int64)
+            nparents = len(df['parent_sequence'].cat.categories)
+            picked = _topk_per_parent(comb, pcodes, num_guides_per_gene, nparents).ravel()
+            result_df = df.iloc[picked[picked >= 0]]
+        else:
+            # nlargest per group is O(N log k) with k ≪ N: rows that can
+            # never be selected are skipped instead of paying for a full
+            # sort. Ties keep the first occurrence, like stable sort + head
+            idx = (df.groupby('parent_sequence', sort=False, observed=True)['on_plus_off']
+                     .nlargest(num_guides_per_gene).index.get_level_values(-1))
+            result_df = df.loc[idx]
+        # Only the handful of selected rows get sorted for presentation
+        result_df = result_df.sort_values('on_plus_off', ascending=False, kind='stable')
+
+        # One stdout write for all parents instead of a print per group
+        per_parent = result_df.groupby('parent_sequence', sort=False, observed=True).size()
+        print('\n'.join(f"   {parent}: selected {count} guides"
+                        for parent, count in per_parent.items()))
     else:
         # No parent information, just take top N overall
-        result_df = df.head(num_guides_per_gene)
+        result_df = df.nlargest(num_guides_per_gene, 'on_plus_off')
         print(f"   Selected top {len(result_df)} guides overall")
-    
+
     return result_df
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description="Select top CRISPR guides from IDT analysis results",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -162,33 +382,20 @@ Examples:
 
     # Guide selection parameters are controlled by policy.yaml only for reproducibility
     
-    args = parser.parse_args()
-    
+    args = parser.parse_args(argv)
+
+    # Arguments are valid; now pay for the numeric stack
+    _import_heavy()
+
     print("🧬 CRISPR Guide Selection")
     print("=" * 50)
     
     # Load and combine all IDT results
-    all_results = []
-    for file_path in args.input_files:
-        if not Path(file_path).exists():
-            print(f"⚠️  File not found: {file_path}")
-            continue
-        
-        df = load_idt_results(file_path)
-        if df is not None:
-            all_results.append(df)
-    
-    if not all_results:
-        print("❌ No valid input files found")
-        return
-    
-    # Combine all results
-    combined_df = pd.concat(all_results, ignore_index=True)
-    print(f"📊 Combined {len(combined_df)} sequences from {len(all_results)} files")
-    
     # All guide selection parameters come from policy.yaml for reproducibility
-    
-    # Validate required guide selection policy keys (accepted_pams is optional)
+
+    # Validate required guide selection policy keys (accepted_pams is
+    # optional); this runs before loading because the filters are applied
+    # chunk-wise during the read below
     required_guide_keys = ['POLICY_GUIDE_SELECTION_MIN_ON_TARGET_SCORE', 'POLICY_GUIDE_SELECTION_MIN_OFF_TARGET_SCORE',
                           'POLICY_GUIDE_SELECTION_NUM_GUIDES_PER_GENE']
     missing_keys = [key for key in required_guide_keys if key not in CONFIG]
@@ -198,10 +405,51 @@ Examples:
             print(f"   - {key}")
         print(f"💡 Please add these keys to your policy.yaml file.")
         sys.exit(1)
-    
-    # Apply filters
-    filtered_df = apply_guide_selection_filters(combined_df, CONFIG)
-    
+
+    # Load each file in chunks with the selection filters applied during
+    # the read, so only the survivors ever accumulate in memory
+    existing_files = []
+    for file_path in args.input_files:
+        if not Path(file_path).exists():
+            print(f"⚠️  File not found: {file_path}")
+            continue
+        existing_files.append(file_path)
+
+    # Multi-file runs parse in parallel: the pandas C engine and pyarrow
+    # release the GIL while parsing, so threads overlap I/O and parse
+    # work across files; results come back in input order
+    if len(existing_files) > 1:
+        with ThreadPoolExecutor(max_workers=min(8, len(existing_files))) as executor:
+            loaded = list(executor.map(lambda p: load_idt_results(p, CONFIG), existing_files))
+    else:
+        loaded = [load_idt_results(p, CONFIG) for p in existing_files]
+
+    all_results = []
+    total_loaded = 0
+    for df, file_rows in loaded:
+        if df is not None:
+            all_results.append(df)
+            total_loaded += file_rows
+
+    if not all_results:
+        print("❌ No valid input files found")
+        return
+
+    # Combine the filtered survivors; the common single-file invocation
+    # skips the concat copy and index rebuild entirely
+    if len(all_results) == 1:
+        filtered_df = all_results[0].reset_index(drop=True)
+    else:
+        filtered_df = pd.concat(all_results, ignore_index=True)
+    print(f"📊 {len(filtered_df)} of {total_loaded} sequences passed filters across {len(all_results)} files")
+
+    # Loading casts these per file, but concat across files with different
+    # category sets decays to object dtype; re-cast once so the per-parent
+    # groupby keeps running on integer category codes
+    for column in ('pam', 'parent_sequence'):
+        if column in filtered_df.columns and filtered_df[column].dtype != 'category':
+            filtered_df[column] = filtered_df[column].astype('category')
+
     if len(filtered_df) == 0:
         print("❌ No sequences passed the selection criteria")
         return
@@ -209,22 +457,30 @@ Examples:
     # Select top guides
     top_guides = select_top_guides(filtered_df, CONFIG)
     
-    # Save results
+    # Save results; the format follows the configured suffix. Columnar
+    # formats skip float→ASCII serialization entirely; the CSV path uses
+    # pandas' C float formatter and a bounded write buffer
     output_file = CONFIG.get("OUTPUTS_TOP_GUIDES")
-    top_guides.to_csv(output_file, index=False)
+    if output_file.endswith('.parquet'):
+        top_guides.to_parquet(output_file, engine='pyarrow', compression='zstd', index=False)
+    elif output_file.endswith('.feather'):
+        top_guides.to_feather(output_file)
+    else:
+        top_guides.to_csv(output_file, index=False, float_format='%.4f', chunksize=100_000)
     print(f"✅ Saved {len(top_guides)} top guides to {output_file}")
     
-    # Show summary
-    print(f"\n📈 Selection Summary:")
-    print(f"   Total sequences processed: {len(combined_df)}")
-    print(f"   Sequences passing filters: {len(filtered_df)}")
-    print(f"   Top guides selected: {len(top_guides)}")
-    
+    # Show summary, buffered into a single stdout write
+    summary_lines = [
+        "\n📈 Selection Summary:",
+        f"   Total sequences processed: {total_loaded}",
+        f"   Sequences passing filters: {len(filtered_df)}",
+        f"   Top guides selected: {len(top_guides)}",
+    ]
     if len(top_guides) > 0:
-        print(f"   Best combined score: {top_guides['on_plus_off'].max():.1f}")
-        print(f"   Average combined score: {top_guides['on_plus_off'].mean():.1f}")
-    
-    print(f"\n💡 Open {output_file} in Excel and sort by 'on_plus_off' column to see best targets first!")
+        summary_lines.append(f"   Best combined score: {top_guides['on_plus_off'].max():.1f}")
+        summary_lines.append(f"   Average combined score: {top_guides['on_plus_off'].mean():.1f}")
+    summary_lines.append(f"\n💡 Open {output_file} in Excel and sort by 'on_plus_off' column to see best targets first!")
+    print('\n'.join(summary_lines))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+species_map.py
+
+UCSC genome assembly → IDT (species, assembly) mapping.
+
+Kept in its own module with zero heavy imports so callers that only need
+the mapping (e.g. manifest generation) don't pay for the IDT module's
+requests/pandas imports and its config validation side effects.
+"""
+
+SPECIES_MAP = {
+    "hg38": ("human", "hg38"),
+    "hg19": ("human", "hg19"),
+    "mm10": ("mouse", "mm10"),
+    "mm39": ("mouse", "mm39"),
+    "rn7": ("rat", "rn7"),
+    "danRer11": ("zebrafish", "danRer11"),
+    "ce11": ("c_elegans", "ce11"),
+}